@@ -12,6 +12,13 @@ XDTS_VERSION = 5
 
 # Default export settings
 DEFAULT_PNG_COMPRESSION = 6
+FAST_PNG_COMPRESSION = 1  # Used when fast encoding is enabled
+
+# Upper limit for background threads encoding PNG frames
+MAX_ENCODE_THREADS = 4
+
+# Minimum seconds between progress callbacks from the export engine
+PROGRESS_REPORT_INTERVAL = 0.05
 
 # Special markers
 SYMBOL_NULL_CELL = "SYMBOL_NULL_CELL"
@@ -29,5 +36,5 @@ REFERENCE_LAYER_COLOR = 8
 # Set to False when Krita adds native stop frame support.
 ENABLE_STOP_FRAME_DETECTION = True
 
-# Supported layer types for animation export
-ANIMATED_LAYER_TYPES = ["paintlayer"]
+# Supported layer types for animation export (frozenset for fast membership tests)
+ANIMATED_LAYER_TYPES = frozenset(("paintlayer",))
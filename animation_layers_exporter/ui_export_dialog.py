@@ -4,14 +4,16 @@ Modal dialog for exporting animation layers to XDTS format.
 """
 
 import os
+import functools
 import krita
 
 from .qt_compat import (
-    QWidget, QVBoxLayout, QHBoxLayout, QFormLayout,
+    QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
     QLabel, QPushButton, QProgressDialog, QMessageBox,
     QFileDialog, QCheckBox, QSpinBox, QGroupBox, QLineEdit,
-    QApplication, get_window_modality, QUrl, QDesktopServices,
-    QDialog, QDialogButtonBox, QComboBox, QSettings, QStandardPaths
+    QApplication, get_window_modality, QUrl, QDesktopServices, Qt,
+    QDialog, QDialogButtonBox, QComboBox, QSettings, QStandardPaths, QTimer,
+    QObject, QRunnable, QThreadPool, QFileInfo, pyqtSignal
 )
 from .config import VERSION, PLUGIN_NAME, DEFAULT_PNG_COMPRESSION, PLUGIN_ID
 from .xdts_core import XDTSExportEngine
@@ -23,6 +25,9 @@ from .xdts_core.utils import sanitize_filename
 FILE_FORMAT_SEQ_ONLY = 0       # 0001 (extension follows chosen image format)
 FILE_FORMAT_LAYER_SEQ = 1      # LayerName_0001 (extension follows chosen image format)
 
+# Line edits read together when exporting
+TEXT_FIELDS = ("_prefix_edit", "_suffix_edit", "_separator_edit", "_folder_name_edit")
+
 # Settings keys
 SETTINGS_EXPORT_PATH = "export_path"
 SETTINGS_FLATTEN_GROUPS = "flatten_groups"
@@ -30,31 +35,84 @@ SETTINGS_INCLUDE_INVISIBLE = "include_invisible"
 SETTINGS_INCLUDE_REFERENCE = "include_reference"
 SETTINGS_INCLUDE_STATIC = "include_static"
 SETTINGS_USE_FULL_CLIP_RANGE = "use_full_clip_range"
+SETTINGS_FAST_ENCODE = "fast_encode"
 SETTINGS_IMAGE_FORMAT = "image_format"
 SETTINGS_FILE_FORMAT = "file_format"
 SETTINGS_FILE_PREFIX = "file_prefix"
 SETTINGS_FILE_SUFFIX = "file_suffix"
 SETTINGS_FILE_SEPARATOR = "file_separator"
 
+SETTINGS_KEYS = (
+    SETTINGS_EXPORT_PATH,
+    SETTINGS_FLATTEN_GROUPS,
+    SETTINGS_INCLUDE_INVISIBLE,
+    SETTINGS_INCLUDE_REFERENCE,
+    SETTINGS_INCLUDE_STATIC,
+    SETTINGS_USE_FULL_CLIP_RANGE,
+    SETTINGS_FAST_ENCODE,
+    SETTINGS_IMAGE_FORMAT,
+    SETTINGS_FILE_FORMAT,
+    SETTINGS_FILE_PREFIX,
+    SETTINGS_FILE_SUFFIX,
+    SETTINGS_FILE_SEPARATOR,
+)
+
+# In-memory copy of the persistent settings, shared across dialog instances
+_settings_cache = {}
+
 
+def _load_settings(qsettings) -> dict:
+    """Bulk-read all known settings into the in-memory cache.
+    
+    The backend (registry, plist or INI file) is only queried the first
+    time; later calls return the already populated cache.
+    
+    Args:
+        qsettings: The QSettings instance to read from.
+        
+    Returns:
+        The settings cache dictionary.
+    """
+    if not _settings_cache:
+        for key in SETTINGS_KEYS:
+            if qsettings.contains(key):
+                _settings_cache[key] = qsettings.value(key)
+    return _settings_cache
+
+
+def _flush_settings(qsettings) -> None:
+    """Write the in-memory settings cache back to the settings backend.
+    
+    Args:
+        qsettings: The QSettings instance to write to.
+    """
+    for key, value in _settings_cache.items():
+        qsettings.setValue(key, value)
+    qsettings.sync()
+
+
+# The user's Documents folder, resolved once since it doesn't move during a session.
+# QStandardPaths.StandardLocation.DocumentsLocation works on all platforms:
+# - Windows: C:/Users/<USER>/Documents
+# - macOS: /Users/<USER>/Documents  
+# - Linux: /home/<USER>/Documents (or ~/Documents)
+_DEFAULT_DOCS = QStandardPaths.writableLocation(
+    QStandardPaths.StandardLocation.DocumentsLocation
+)
+
+
+@functools.lru_cache(maxsize=1)
 def get_default_export_path() -> str:
     """Get the default export path based on the operating system.
     
-    Returns the user's Documents folder on all platforms.
+    Returns the user's Documents folder on all platforms. The result is
+    cached for the session since the Documents location doesn't change.
     
     Returns:
         Path to the default export directory.
     """
-    # QStandardPaths.StandardLocation.DocumentsLocation works on all platforms:
-    # - Windows: C:/Users/<USER>/Documents
-    # - macOS: /Users/<USER>/Documents  
-    # - Linux: /home/<USER>/Documents (or ~/Documents)
-    docs_path = QStandardPaths.writableLocation(
-        QStandardPaths.StandardLocation.DocumentsLocation
-    )
-    
-    if docs_path and os.path.isdir(docs_path):
-        return docs_path
+    if _DEFAULT_DOCS and os.path.isdir(_DEFAULT_DOCS):
+        return _DEFAULT_DOCS
     
     # Fallback to home directory if Documents doesn't exist
     return os.path.expanduser("~")
@@ -85,6 +143,70 @@ def get_document_name(document) -> str:
     return "Untitled_Animation"
 
 
+def _populate_combo(combo, items: list) -> None:
+    """Fill a combo box in one batch with signals blocked.
+    
+    Args:
+        combo: The QComboBox to populate.
+        items: List of (label, data) tuples.
+    """
+    combo.blockSignals(True)
+    combo.addItems([label for label, _ in items])
+    for index, (_, data) in enumerate(items):
+        combo.setItemData(index, data)
+    combo.blockSignals(False)
+
+
+def _build_grid_layout(rows: list) -> QGridLayout:
+    """Lay out label/widget rows in a two-column grid in a single pass.
+    
+    Args:
+        rows: List of (label, widget) tuples. A row with a None label
+            spans both columns.
+            
+    Returns:
+        The populated QGridLayout.
+    """
+    grid = QGridLayout()
+    grid.setContentsMargins(8, 8, 8, 8)
+    grid.setColumnStretch(1, 1)
+    for row, (label, widget) in enumerate(rows):
+        if label is None:
+            grid.addWidget(widget, row, 0, 1, 2)
+        else:
+            grid.addWidget(QLabel(label), row, 0)
+            grid.addWidget(widget, row, 1)
+    return grid
+
+
+class _PathProbeNotifier(QObject):
+    """Delivers the result of a background directory check to the UI thread."""
+    
+    # (probed path, usable export directory)
+    finished = pyqtSignal(str, str)
+
+
+class _PathProbeTask(QRunnable):
+    """Checks whether a path is a directory on a worker thread.
+    
+    Falls back to the default export path (resolved on the same thread)
+    when it isn't. Keeps slow filesystems (e.g. network-mounted Documents
+    folders) from blocking the dialog while it opens.
+    """
+    
+    def __init__(self, path: str, notifier: _PathProbeNotifier):
+        super().__init__()
+        self._path = path
+        self._notifier = notifier
+    
+    def run(self):
+        if self._path and QFileInfo(self._path).isDir():
+            resolved = self._path
+        else:
+            resolved = get_default_export_path()
+        self._notifier.finished.emit(self._path, resolved)
+
+
 class XDTSExportDialog(QDialog):
     """Modal dialog for exporting animations to XDTS format.
     
@@ -97,14 +219,15 @@ class XDTSExportDialog(QDialog):
         self.setWindowTitle(f"Export Animation Layers (XDTS) - v{VERSION}")
         self.setMinimumWidth(480)
         
-        self._document = krita.Krita.instance().activeDocument()
+        self._krita = krita.Krita.instance()
+        self._document = self._krita.activeDocument()
+        self._doc_name = get_document_name(self._document)
         self._settings = QSettings("krita", PLUGIN_ID)
+        _load_settings(self._settings)
         
-        # Load saved export path
-        self._export_path = self._settings.value(
-            SETTINGS_EXPORT_PATH, 
-            get_default_export_path()
-        )
+        # Load saved export path (empty until the path probe picks the
+        # default, which touches the filesystem)
+        self._export_path = _settings_cache.get(SETTINGS_EXPORT_PATH) or ""
         
         # Load other persistent settings using safe read helpers
         self._flatten_groups = self._read_setting_bool(SETTINGS_FLATTEN_GROUPS, True)
@@ -112,18 +235,60 @@ class XDTSExportDialog(QDialog):
         self._include_reference = self._read_setting_bool(SETTINGS_INCLUDE_REFERENCE, False)
         self._include_static = self._read_setting_bool(SETTINGS_INCLUDE_STATIC, False)
         self._use_full_clip_range = self._read_setting_bool(SETTINGS_USE_FULL_CLIP_RANGE, True)
+        self._fast_encode = self._read_setting_bool(SETTINGS_FAST_ENCODE, False)
         
-        self._image_format = self._settings.value(SETTINGS_IMAGE_FORMAT, "png")
+        self._image_format = _settings_cache.get(SETTINGS_IMAGE_FORMAT, "png")
         self._file_format = self._read_setting_int(SETTINGS_FILE_FORMAT, FILE_FORMAT_LAYER_SEQ)
-        self._file_prefix = self._settings.value(SETTINGS_FILE_PREFIX, "")
-        self._file_suffix = self._settings.value(SETTINGS_FILE_SUFFIX, "")
-        self._file_separator = self._settings.value(SETTINGS_FILE_SEPARATOR, "_")
-        
-        self._setup_ui()
-        self._connect_signals()
-        self._update_folder_name_default()
-        self._load_initial_path()
-        self._load_ui_settings()
+        self._file_prefix = _settings_cache.get(SETTINGS_FILE_PREFIX, "")
+        self._file_suffix = _settings_cache.get(SETTINGS_FILE_SUFFIX, "")
+        self._file_separator = _settings_cache.get(SETTINGS_FILE_SEPARATOR, "_")
+        
+        # Debounce settings writes so repeated changes hit the backend once
+        self._settings_dirty = False
+        self._save_timer = QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(500)
+        self._save_timer.timeout.connect(self._flush_pending_settings)
+        
+        # Widgets are built on first show (see showEvent)
+        self._ui_built = False
+    
+    def showEvent(self, event):
+        """Build the user interface the first time the dialog is shown."""
+        if not self._ui_built:
+            self._ui_built = True
+            self._setup_ui()
+            self._connect_signals()
+            self._update_folder_name_default()
+            self._load_initial_path()
+            self._load_ui_settings()
+            # show() sized the dialog while it was still empty; resize
+            # to the new layout before QDialog centres it over the parent
+            self.adjustSize()
+        super().showEvent(event)
+    
+    def done(self, result):
+        """Persist pending settings when the dialog is accepted or rejected."""
+        self._flush_pending_settings()
+        super().done(result)
+    
+    def closeEvent(self, event):
+        """Persist pending settings when the dialog window is closed."""
+        self._flush_pending_settings()
+        super().closeEvent(event)
+    
+    def _schedule_settings_flush(self):
+        """Mark settings as changed and (re)start the debounce timer."""
+        self._settings_dirty = True
+        self._save_timer.start()
+    
+    def _flush_pending_settings(self):
+        """Write the settings cache to the backend if it has changed."""
+        self._save_timer.stop()
+        if not self._settings_dirty:
+            return
+        self._settings_dirty = False
+        _flush_settings(self._settings)
     
     def _read_setting_bool(self, key: str, default: bool) -> bool:
         """Safely read a boolean setting that might be stored as a string.
@@ -131,7 +296,7 @@ class XDTSExportDialog(QDialog):
         QSettings can sometimes return strings like 'true'/'false' or '1'/'0'
         depending on the platform and how the setting was saved.
         """
-        val = self._settings.value(key, default)
+        val = _settings_cache.get(key, default)
         if isinstance(val, str):
             return val.lower() in ('true', 'yes', 'on', '1')
         if isinstance(val, bool):
@@ -140,7 +305,7 @@ class XDTSExportDialog(QDialog):
 
     def _read_setting_int(self, key: str, default: int) -> int:
         """Safely read an integer setting that might be stored as a string."""
-        val = self._settings.value(key, default)
+        val = _settings_cache.get(key, default)
         try:
             return int(val)
         except (ValueError, TypeError):
@@ -148,18 +313,32 @@ class XDTSExportDialog(QDialog):
 
     def _setup_ui(self):
         """Initialize the user interface."""
+        # Batch style/geometry recalculation until all widgets are in place
+        self.setUpdatesEnabled(False)
+        
         layout = QVBoxLayout(self)
         layout.setContentsMargins(12, 12, 12, 12)
         layout.setSpacing(10)
         
-        # Header description
+        # Header description (plain text labels, no rich text parsing)
+        header_title = QLabel("Export Animation Layers (XDTS)")
+        header_title.setTextFormat(Qt.TextFormat.PlainText)
+        title_font = header_title.font()
+        title_font.setBold(True)
+        header_title.setFont(title_font)
+        
         header_label = QLabel(
-            "<b>Export Animation Layers (XDTS)</b><br>"
-            "Exports animated layers and groups as image sequences with timing " \
+            "Exports animated layers and groups as image sequences with timing "
             "data saved in the Toei Digital Exposure Sheet (.xdts) format."
         )
+        header_label.setTextFormat(Qt.TextFormat.PlainText)
         header_label.setWordWrap(True)
-        layout.addWidget(header_label)
+        
+        header_layout = QVBoxLayout()
+        header_layout.setSpacing(0)
+        header_layout.addWidget(header_title)
+        header_layout.addWidget(header_label)
+        layout.addLayout(header_layout)
         
         # === Output Location Group ===
         path_group = QGroupBox("Output Location")
@@ -194,97 +373,104 @@ class XDTSExportDialog(QDialog):
         
         # === File Naming Group ===
         naming_group = QGroupBox("File Naming")
-        naming_layout = QFormLayout()
-        naming_layout.setContentsMargins(8, 8, 8, 8)
+        naming_rows = []
         
         # Format dropdown
         self._format_combo = QComboBox()
-        self._format_combo.addItem("Sequence number only (0001.ext)", FILE_FORMAT_SEQ_ONLY)
-        self._format_combo.addItem("Layer name + sequence (Layer_0001.ext)", FILE_FORMAT_LAYER_SEQ)
+        _populate_combo(self._format_combo, [
+            ("Sequence number only (0001.ext)", FILE_FORMAT_SEQ_ONLY),
+            ("Layer name + sequence (Layer_0001.ext)", FILE_FORMAT_LAYER_SEQ),
+        ])
         self._format_combo.setCurrentIndex(FILE_FORMAT_LAYER_SEQ)
         self._format_combo.setToolTip("Choose how exported frame files are named.")
-        naming_layout.addRow("Format:", self._format_combo)
+        naming_rows.append(("Format:", self._format_combo))
         
         # Prefix
         self._prefix_edit = QLineEdit()
         self._prefix_edit.setPlaceholderText("Optional")
         self._prefix_edit.setToolTip("Text to add before the layer name/sequence number.")
-        naming_layout.addRow("Prefix:", self._prefix_edit)
+        naming_rows.append(("Prefix:", self._prefix_edit))
         
         # Suffix
         self._suffix_edit = QLineEdit()
         self._suffix_edit.setPlaceholderText("Optional")
         self._suffix_edit.setToolTip("Text to add after the layer name (before sequence number).")
-        naming_layout.addRow("Suffix:", self._suffix_edit)
+        naming_rows.append(("Suffix:", self._suffix_edit))
         
         # Separator
         self._separator_edit = QLineEdit("_")
         self._separator_edit.setMaximumWidth(60)
         self._separator_edit.setToolTip("Character(s) used between name parts.")
-        naming_layout.addRow("Separator:", self._separator_edit)
+        naming_rows.append(("Separator:", self._separator_edit))
         
-        naming_group.setLayout(naming_layout)
+        naming_group.setLayout(_build_grid_layout(naming_rows))
         layout.addWidget(naming_group)
         
         # === Export Options Group ===
         options_group = QGroupBox("Export Options")
-        options_layout = QFormLayout()
-        options_layout.setContentsMargins(8, 8, 8, 8)
+        options_rows = []
+        
+        # Checked states are applied from settings in _load_ui_settings()
         
         # Flatten groups
         self._flatten_groups_checkbox = QCheckBox("Flatten animated groups")
-        self._flatten_groups_checkbox.setChecked(True)
         self._flatten_groups_checkbox.setToolTip(
             "Merge group layers into a single flattened image.\n"
             "Useful when a group contains separate line/color layers\n"
             "that should be combined for the final export."
         )
-        options_layout.addRow(self._flatten_groups_checkbox)
+        options_rows.append((None, self._flatten_groups_checkbox))
         
         # Include invisible layers
         self._invisible_checkbox = QCheckBox("Include invisible layers")
-        self._invisible_checkbox.setChecked(False)
         self._invisible_checkbox.setToolTip(
             "Export animated layers that are currently hidden in the document."
         )
-        options_layout.addRow(self._invisible_checkbox)
+        options_rows.append((None, self._invisible_checkbox))
         
         # Include reference layers (grey color label)
         self._reference_checkbox = QCheckBox("Include reference layers (grey)")
-        self._reference_checkbox.setChecked(False)
         self._reference_checkbox.setToolTip(
             "Export layers marked with a grey color label.\n"
             "These are typically used as animation reference guides."
         )
-        options_layout.addRow(self._reference_checkbox)
+        options_rows.append((None, self._reference_checkbox))
         
         # Include static (non-animated) layers
         self._static_checkbox = QCheckBox("Include non-animated layers")
-        self._static_checkbox.setChecked(False)
         self._static_checkbox.setToolTip(
             "Export layers without animation keyframes as single images.\n"
             "Useful for backgrounds, layouts, peg bars, or safety margins."
         )
-        options_layout.addRow(self._static_checkbox)
+        options_rows.append((None, self._static_checkbox))
         
         # Full clip range
         self._full_range_checkbox = QCheckBox("Use full clip range")
-        self._full_range_checkbox.setChecked(True)
         self._full_range_checkbox.setToolTip(
             "Export the full animation clip range.\n"
             "Uncheck to export only the selected playback range."
         )
-        options_layout.addRow(self._full_range_checkbox)
+        options_rows.append((None, self._full_range_checkbox))
         
         # Image format selection
         self._image_format_combo = QComboBox()
-        self._image_format_combo.addItem("PNG (.png)", "png")
-        self._image_format_combo.addItem("Targa (.tga)", "tga")
+        _populate_combo(self._image_format_combo, [
+            ("PNG (.png)", "png"),
+            ("Targa (.tga)", "tga"),
+        ])
         self._image_format_combo.setCurrentIndex(0)
         self._image_format_combo.setToolTip("Choose image file format for exported frames.")
-        options_layout.addRow("Image format:", self._image_format_combo)
+        options_rows.append(("Image format:", self._image_format_combo))
+        
+        # Fast PNG encoding
+        self._fast_encode_checkbox = QCheckBox("Fast PNG encoding")
+        self._fast_encode_checkbox.setToolTip(
+            "Use the fastest PNG compression level.\n"
+            "Speeds up exports at the cost of slightly larger files."
+        )
+        options_rows.append((None, self._fast_encode_checkbox))
         
-        options_group.setLayout(options_layout)
+        options_group.setLayout(_build_grid_layout(options_rows))
         layout.addWidget(options_group)
         
         # Spacer
@@ -299,6 +485,8 @@ class XDTSExportDialog(QDialog):
         self._button_box.addButton(QDialogButtonBox.StandardButton.Cancel)
         
         layout.addWidget(self._button_box)
+        
+        self.setUpdatesEnabled(True)
     
     def _load_ui_settings(self):
         """Apply loaded settings to UI widgets."""
@@ -307,6 +495,7 @@ class XDTSExportDialog(QDialog):
         self._reference_checkbox.setChecked(self._include_reference)
         self._static_checkbox.setChecked(self._include_static)
         self._full_range_checkbox.setChecked(self._use_full_clip_range)
+        self._fast_encode_checkbox.setChecked(self._fast_encode)
         
         # Set combo boxes by data or index
         index = self._image_format_combo.findData(self._image_format)
@@ -327,31 +516,45 @@ class XDTSExportDialog(QDialog):
         self._button_box.rejected.connect(self.reject)
     
     def _load_initial_path(self):
-        """Load the initial export path into the UI."""
-        if self._export_path and os.path.isdir(self._export_path):
-            self._path_edit.setText(self._export_path)
-        else:
+        """Load the initial export path into the UI.
+        
+        The path is validated on a worker thread; the Export button is
+        enabled once the check completes.
+        """
+        self._path_edit.setText(self._export_path)
+        
+        self._path_probe = _PathProbeNotifier(self)
+        self._path_probe.finished.connect(self._on_initial_path_probed)
+        QThreadPool.globalInstance().start(
+            _PathProbeTask(self._export_path, self._path_probe)
+        )
+    
+    def _on_initial_path_probed(self, path: str, resolved: str):
+        """Handle the result of the initial export path check."""
+        # Ignore a stale result if the user already picked another path
+        if path == self._export_path and resolved != path:
             # Path is invalid or missing; reset to default
-            self._export_path = get_default_export_path()
+            self._export_path = resolved
             self._path_edit.setText(self._export_path)
-            # Save the reset path to settings
-            self._settings.setValue(SETTINGS_EXPORT_PATH, self._export_path)
+            # Save the reset path to the settings cache
+            _settings_cache[SETTINGS_EXPORT_PATH] = self._export_path
+            self._schedule_settings_flush()
         self._export_button.setEnabled(True)
     
     def _save_export_path(self):
-        """Save the current export path to settings."""
+        """Save the current export path to the settings cache."""
         if self._export_path:
-            self._settings.setValue(SETTINGS_EXPORT_PATH, self._export_path)
+            _settings_cache[SETTINGS_EXPORT_PATH] = self._export_path
+            self._schedule_settings_flush()
     
     def _update_folder_name_default(self):
         """Set the default folder name based on document name."""
-        doc_name = get_document_name(self._document)
-        self._folder_name_edit.setText(doc_name)
+        self._folder_name_edit.setText(self._doc_name)
     
     def _on_browse(self):
         """Handle browse button click."""
         # Start from current path if valid, otherwise use default
-        start_path = self._export_path if os.path.isdir(self._export_path) else get_default_export_path()
+        start_path = self._export_path if QFileInfo(self._export_path).isDir() else get_default_export_path()
         
         path = QFileDialog.getExistingDirectory(
             self, 
@@ -365,24 +568,30 @@ class XDTSExportDialog(QDialog):
             # Save immediately when user selects a new path
             self._save_export_path()
     
-    def _build_export_path(self) -> str:
+    def _build_export_path(self, folder_name: str = None) -> str:
         """Build the full export path including subfolder.
         
+        Args:
+            folder_name: Stripped folder name text, if already read from
+                the UI. Read from the folder name field when omitted.
+        
         Returns:
             Full path to the export folder.
         """
-        folder_name = self._folder_name_edit.text().strip()
+        if folder_name is None:
+            folder_name = self._folder_name_edit.text().strip()
         if not folder_name:
-            folder_name = get_document_name(self._document)
+            folder_name = self._doc_name
         
-        # Sanitize the folder name
-        folder_name = sanitize_filename(folder_name)
+        # Sanitize the folder name (the default document name already is)
+        if folder_name != self._doc_name:
+            folder_name = sanitize_filename(folder_name)
         
         return os.path.join(self._export_path, folder_name)
     
     def _on_export(self):
         """Handle export button click."""
-        document = krita.Krita.instance().activeDocument()
+        document = self._krita.activeDocument()
         if not document:
             QMessageBox.warning(
                 self,
@@ -391,50 +600,81 @@ class XDTSExportDialog(QDialog):
             )
             return
         
+        # Validate the output location before building any export state
+        if not self._export_path or not QFileInfo(self._export_path).isDir():
+            QMessageBox.warning(
+                self,
+                "Invalid Output Location",
+                "The selected export directory does not exist.\n"
+                "Please choose another directory."
+            )
+            return
+        
+        # Read all text fields once for both settings and options
+        texts = self._read_text_fields()
+        
         # Save current settings before starting export
-        self._save_settings()
+        self._save_settings(texts)
         
         # Build the full export path with subfolder
-        full_export_path = self._build_export_path()
-        
-        # Build options from UI state
-        options = ExportOptions()
-        options.include_invisible = self._invisible_checkbox.isChecked()
-        options.include_reference = self._reference_checkbox.isChecked()
-        options.include_static = self._static_checkbox.isChecked()
-        options.flatten_groups = self._flatten_groups_checkbox.isChecked()
-        options.png_compression = DEFAULT_PNG_COMPRESSION
-        options.image_format = self._image_format_combo.currentData()
-        options.use_full_clip_range = self._full_range_checkbox.isChecked()
-        
-        # File naming options
-        options.file_format = self._format_combo.currentData()
-        options.file_prefix = self._prefix_edit.text()
-        options.file_suffix = self._suffix_edit.text()
-        options.file_separator = self._separator_edit.text() or "_"
-        
-        # Export folder name (for XDTS file naming)
-        options.export_name = self._folder_name_edit.text().strip()
-        if not options.export_name:
-            options.export_name = get_document_name(document)
+        folder_name = texts['_folder_name_edit'].strip()
+        full_export_path = self._build_export_path(folder_name)
+        
+        # Build options from UI state in a single construction
+        options = ExportOptions.from_dict({
+            'include_invisible': self._invisible_checkbox.isChecked(),
+            'include_reference': self._reference_checkbox.isChecked(),
+            'include_static': self._static_checkbox.isChecked(),
+            'flatten_groups': self._flatten_groups_checkbox.isChecked(),
+            'png_compression': DEFAULT_PNG_COMPRESSION,
+            'fast_encode': self._fast_encode_checkbox.isChecked(),
+            'image_format': self._image_format_combo.currentData(),
+            'use_full_clip_range': self._full_range_checkbox.isChecked(),
+            
+            # File naming options
+            'file_format': self._format_combo.currentData(),
+            'file_prefix': texts['_prefix_edit'],
+            'file_suffix': texts['_suffix_edit'],
+            'file_separator': texts['_separator_edit'] or "_",
+            
+            # Export folder name (for XDTS file naming)
+            'export_name': folder_name or self._doc_name,
+        })
         
         # Run export
         self._run_export(document, full_export_path, options)
     
-    def _save_settings(self):
-        """Save current UI settings to QSettings."""
+    def _read_text_fields(self) -> dict:
+        """Read the current text of all line edits used by the export.
+        
+        Returns:
+            Dictionary mapping line edit attribute names to their text.
+        """
+        return {name: getattr(self, name).text() for name in TEXT_FIELDS}
+    
+    def _save_settings(self, texts: dict = None):
+        """Save current UI settings to the settings cache.
+        
+        Args:
+            texts: Text field values from _read_text_fields(), if already read.
+        """
+        if texts is None:
+            texts = self._read_text_fields()
+        
         # Using int casting for boolean settings improves compatibility across systems
-        self._settings.setValue(SETTINGS_FLATTEN_GROUPS, int(self._flatten_groups_checkbox.isChecked()))
-        self._settings.setValue(SETTINGS_INCLUDE_INVISIBLE, int(self._invisible_checkbox.isChecked()))
-        self._settings.setValue(SETTINGS_INCLUDE_REFERENCE, int(self._reference_checkbox.isChecked()))
-        self._settings.setValue(SETTINGS_INCLUDE_STATIC, int(self._static_checkbox.isChecked()))
-        self._settings.setValue(SETTINGS_USE_FULL_CLIP_RANGE, int(self._full_range_checkbox.isChecked()))
-        
-        self._settings.setValue(SETTINGS_IMAGE_FORMAT, self._image_format_combo.currentData())
-        self._settings.setValue(SETTINGS_FILE_FORMAT, self._format_combo.currentData())
-        self._settings.setValue(SETTINGS_FILE_PREFIX, self._prefix_edit.text())
-        self._settings.setValue(SETTINGS_FILE_SUFFIX, self._suffix_edit.text())
-        self._settings.setValue(SETTINGS_FILE_SEPARATOR, self._separator_edit.text())
+        _settings_cache[SETTINGS_FLATTEN_GROUPS] = int(self._flatten_groups_checkbox.isChecked())
+        _settings_cache[SETTINGS_INCLUDE_INVISIBLE] = int(self._invisible_checkbox.isChecked())
+        _settings_cache[SETTINGS_INCLUDE_REFERENCE] = int(self._reference_checkbox.isChecked())
+        _settings_cache[SETTINGS_INCLUDE_STATIC] = int(self._static_checkbox.isChecked())
+        _settings_cache[SETTINGS_USE_FULL_CLIP_RANGE] = int(self._full_range_checkbox.isChecked())
+        _settings_cache[SETTINGS_FAST_ENCODE] = int(self._fast_encode_checkbox.isChecked())
+        
+        _settings_cache[SETTINGS_IMAGE_FORMAT] = self._image_format_combo.currentData()
+        _settings_cache[SETTINGS_FILE_FORMAT] = self._format_combo.currentData()
+        _settings_cache[SETTINGS_FILE_PREFIX] = texts['_prefix_edit']
+        _settings_cache[SETTINGS_FILE_SUFFIX] = texts['_suffix_edit']
+        _settings_cache[SETTINGS_FILE_SEPARATOR] = texts['_separator_edit']
+        self._schedule_settings_flush()
 
     def _run_export(self, document, export_path: str, options: ExportOptions):
         """Execute the export with progress dialog.
@@ -445,19 +685,22 @@ class XDTSExportDialog(QDialog):
             options: Export configuration.
         """
         # Set batch mode to suppress dialogs
-        krita.Krita.instance().setBatchmode(True)
+        self._krita.setBatchmode(True)
         
         # Create progress dialog
         progress = QProgressDialog("Initializing export...", "Cancel", 0, 100, self)
         progress.setWindowTitle("Exporting Animation Layers")
         progress.setWindowModality(get_window_modality())
         progress.setMinimumDuration(0)
+        # Stay open at 100% while the engine finishes writing; closed below
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
         progress.setValue(0)
         
         cancelled = False
         
         def on_progress(current, total, message):
-            """Update progress dialog."""
+            """Update progress dialog (the engine throttles these calls)."""
             if total > 0:
                 progress.setMaximum(total)
                 progress.setValue(current)
@@ -501,7 +744,7 @@ class XDTSExportDialog(QDialog):
                 f"An unexpected error occurred:\n\n{str(e)}"
             )
         finally:
-            krita.Krita.instance().setBatchmode(False)
+            self._krita.setBatchmode(False)
     
     def _show_success_message(self, result):
         """Display success notification with option to open output folder.
@@ -509,20 +752,31 @@ class XDTSExportDialog(QDialog):
         Args:
             result: The ExportResult from the engine.
         """
-        # Try to show floating message in Krita's UI
-        try:
-            view = krita.Krita.instance().activeWindow().activeView()
+        # Show floating message in Krita's UI when a view is available
+        window = self._krita.activeWindow()
+        view = window.activeView() if window is not None else None
+        if view is not None:
             view.showFloatingMessage(
                 f"XDTS Export Complete: {result.track_count} tracks",
-                krita.Krita.instance().icon("document-save"),
+                self._krita.icon("document-save"),
                 3000,
                 1
             )
-        except:
-            pass
         
-        # Create message box with Open Folder option
-        msg_box = QMessageBox(self)
+        # Post the message box so the export call returns without blocking
+        QTimer.singleShot(0, lambda: self._exec_success_msgbox(result))
+    
+    def _build_success_msgbox(self, result):
+        """Create the export summary message box with an Open Folder option.
+        
+        Args:
+            result: The ExportResult from the engine.
+            
+        Returns:
+            Tuple of (message box, Open Folder button).
+        """
+        # Parent to the main window since this dialog is closed by then
+        msg_box = QMessageBox(self.parentWidget())
         msg_box.setWindowTitle("Export Complete")
         msg_box.setIcon(QMessageBox.Icon.Information)
         msg_box.setText("XDTS export completed successfully!")
@@ -536,8 +790,20 @@ class XDTSExportDialog(QDialog):
         open_folder_btn = msg_box.addButton("Open Folder", QMessageBox.ButtonRole.ActionRole)
         msg_box.addButton(QMessageBox.StandardButton.Ok)
         
+        return msg_box, open_folder_btn
+    
+    def _exec_success_msgbox(self, result):
+        """Show the export summary and open the output folder if requested.
+        
+        Args:
+            result: The ExportResult from the engine.
+        """
+        msg_box, open_folder_btn = self._build_success_msgbox(result)
         msg_box.exec()
+        open_folder = msg_box.clickedButton() == open_folder_btn
+        # Parented to Krita's main window, so it would otherwise live on
+        msg_box.deleteLater()
         
-        if msg_box.clickedButton() == open_folder_btn:
+        if open_folder:
             folder_path = os.path.dirname(result.output_path)
             QDesktopServices.openUrl(QUrl.fromLocalFile(folder_path))
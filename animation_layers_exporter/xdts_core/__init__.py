@@ -9,6 +9,8 @@ from .utils import (
     sanitize_filename,
     compute_content_hash,
     make_unique_name,
+    make_unique_names,
+    copy_file,
 )
 from .document import get_document_info
 from .layer import (
@@ -31,6 +33,8 @@ __all__ = [
     'sanitize_filename',
     'compute_content_hash',
     'make_unique_name',
+    'make_unique_names',
+    'copy_file',
     'get_document_info',
     'get_animated_layers',
     'get_static_layers',
@@ -4,11 +4,30 @@ Main export logic for converting Krita animations to XDTS format with image fram
 """
 
 import os
+import time
 
-from ..config import DEFAULT_PNG_COMPRESSION, SYMBOL_NULL_CELL
-from .utils import mkdir, sanitize_filename, int_to_str, compute_content_hash, make_unique_name
+from ..config import (
+    DEFAULT_PNG_COMPRESSION,
+    FAST_PNG_COMPRESSION,
+    PROGRESS_REPORT_INTERVAL,
+    SYMBOL_NULL_CELL,
+)
+from .utils import (
+    mkdir,
+    sanitize_filename,
+    int_to_str,
+    compute_content_hash,
+    make_unique_names,
+    copy_file,
+)
 from .document import get_document_info
-from .layer import get_animated_layers, get_static_layers, get_layer_keyframes, count_total_keyframes, is_stop_frame
+from .layer import (
+    get_animated_layers,
+    get_static_layers,
+    get_layer_keyframes,
+    get_content_rect,
+    is_stop_frame,
+)
 from .frame_export import FrameExporter
 from .xdts_file import (
     create_xdts_document,
@@ -32,6 +51,7 @@ class ExportOptions:
         self.include_static = False
         self.flatten_groups = False
         self.png_compression = DEFAULT_PNG_COMPRESSION
+        self.fast_encode = False  # Fastest PNG compression, larger files
         self.use_full_clip_range = True
         
         # File naming options
@@ -51,6 +71,7 @@ class ExportOptions:
         opts.include_static = data.get('include_static', False)
         opts.flatten_groups = data.get('flatten_groups', False)
         opts.png_compression = data.get('png_compression', DEFAULT_PNG_COMPRESSION)
+        opts.fast_encode = data.get('fast_encode', False)
         opts.use_full_clip_range = data.get('use_full_clip_range', True)
         opts.file_format = data.get('file_format', cls.FORMAT_LAYER_SEQ)
         opts.file_prefix = data.get('file_prefix', "")
@@ -103,6 +124,20 @@ class XDTSExportEngine:
         
         # Export state
         self._result = ExportResult()
+        self._frame_exporter = None
+        self._last_progress_ts = 0.0
+        # Filename builder for the current options, set when an export starts
+        self._filename_fn = None
+        
+        # Cross-layer deduplication: content key -> first exported file path,
+        # plus (existing, new) file pairs to copy once frames are written
+        self._global_hash_cache = {}
+        self._pending_copies = []
+        # (content rect, region pixels, label) of the layer's last exported cel
+        self._prev_frame = None
+        # Output folder of the current layer, created before its first file
+        self._layer_folder = None
+        self._layer_folder_ready = False
         
     def export(self) -> ExportResult:
         """Execute the export operation.
@@ -115,13 +150,44 @@ class XDTSExportEngine:
         except Exception as e:
             self._result.success = False
             self._result.error_message = str(e)
+        finally:
+            self._close_frame_exporter()
         
         return self._result
     
-    def _report_progress(self, current: int, total: int, message: str):
-        """Report progress if callback is set."""
-        if self.on_progress:
-            self.on_progress(current, total, message)
+    def _close_frame_exporter(self):
+        """Finish queued frame writes and release the frame exporter."""
+        if self._frame_exporter is None:
+            return
+        frame_exporter, self._frame_exporter = self._frame_exporter, None
+        try:
+            frame_exporter.close()
+        except Exception as e:
+            # Keep the first error if the export had already failed
+            if self._result.success:
+                self._result.success = False
+                self._result.error_message = str(e)
+    
+    def _ensure_layer_folder(self):
+        """Create the current layer's output folder if not done yet."""
+        if not self._layer_folder_ready:
+            mkdir(self._layer_folder)
+            self._layer_folder_ready = True
+    
+    def _report_progress(self, current: int, total: int, message: str,
+                         force: bool = False):
+        """Report progress if callback is set.
+        
+        Calls are throttled to one per PROGRESS_REPORT_INTERVAL; the final
+        update (current == total) and forced messages always go through.
+        """
+        if not self.on_progress:
+            return
+        now = time.monotonic()
+        if not force and current != total and now - self._last_progress_ts < PROGRESS_REPORT_INTERVAL:
+            return
+        self._last_progress_ts = now
+        self.on_progress(current, total, message)
     
     def _is_cancelled(self) -> bool:
         """Check if export was cancelled."""
@@ -129,24 +195,28 @@ class XDTSExportEngine:
     
     def _run_export(self):
         """Internal export implementation."""
+        # Local aliases for attributes read throughout the export loops
+        options = self.options
+        document = self.document
+        
         # Gather document info
-        doc_info = get_document_info(self.document)
+        doc_info = get_document_info(document)
         
         # Get exportable animated layers (includes group layers if flatten_groups is enabled)
         animated_layers = get_animated_layers(
-            self.document,
-            self.options.include_invisible,
-            self.options.include_reference,
-            self.options.flatten_groups
+            document,
+            options.include_invisible,
+            options.include_reference,
+            options.flatten_groups
         )
         
         # Get static layers if requested
         static_layers = []
-        if self.options.include_static:
+        if options.include_static:
             static_layers = get_static_layers(
-                self.document,
-                self.options.include_invisible,
-                self.options.include_reference
+                document,
+                options.include_invisible,
+                options.include_reference
             )
         
         if not animated_layers and not static_layers:
@@ -154,45 +224,72 @@ class XDTSExportEngine:
             return
         
         # Determine frame range
-        if self.options.use_full_clip_range:
+        if options.use_full_clip_range:
             start_frame = doc_info['start_frame']
             end_frame = doc_info['end_frame']
         else:
-            start_frame = self.document.playBackStartTime()
-            end_frame = self.document.playBackEndTime()
+            start_frame = document.playBackStartTime()
+            end_frame = document.playBackEndTime()
         
         duration = end_frame - start_frame + 1
         
+        # Scan keyframes once per layer; the lists drive both the progress
+        # total and the export loop below
+        layer_keyframes = [
+            get_layer_keyframes(layer, start_frame, end_frame)
+            for layer in animated_layers
+        ]
+        
         # Count total work for progress reporting (animated keyframes + static layers)
-        total_keyframes = count_total_keyframes(animated_layers, start_frame, end_frame)
+        total_keyframes = sum(len(keyframes) for keyframes in layer_keyframes)
         total_work = total_keyframes + len(static_layers)
         
         # Create XDTS document structure
         xdts_doc = create_xdts_document(duration)
         
-        # Initialize the frame exporter (handles temp document creation)
-        frame_exporter = FrameExporter(self.document)
+        # Initialize the frame exporter (handles temp documents and encoding
+        # threads; released by export() once this method returns)
+        png_compression = (
+            FAST_PNG_COMPRESSION if options.fast_encode
+            else options.png_compression
+        )
+        frame_exporter = self._frame_exporter = FrameExporter(
+            document, png_compression, options.fast_encode
+        )
+        self._filename_fn = self._make_filename_builder()
         
         # Process each animated layer
         processed = 0
         total_unique = 0
-        used_layer_names = set()  # Track used names to handle duplicates
+        
+        # Resolve unique output names for all layers in one pass (duplicates
+        # get numeric suffixes; animated layers first, then static layers)
+        layer_names = make_unique_names([
+            sanitize_filename(layer.name())
+            for layer in animated_layers + static_layers
+        ])
         
         for track_no, layer in enumerate(animated_layers):
-            base_name = sanitize_filename(layer.name())
-            layer_name = make_unique_name(base_name, used_layer_names)
+            layer_name = layer_names[track_no]
             layer_folder = os.path.join(self.export_path, layer_name)
-            mkdir(layer_folder)
+            # Created on the first file written, so layers with only stop
+            # frames don't leave empty folders behind
+            self._layer_folder = layer_folder
+            self._layer_folder_ready = False
+            # Frame paths are built by concatenation (cheaper than os.path.join)
+            layer_prefix = layer_folder + os.sep
             
             # Create track in XDTS document
             track = add_track(xdts_doc, layer_name, track_no)
             
-            # For deduplication: map content hash -> cell label
+            # For deduplication: map content key -> cell label
             hash_to_label = {}
             cell_count = 0
+            self._prev_frame = None
             
-            # Get keyframes for this layer
-            keyframes = get_layer_keyframes(layer, start_frame, end_frame)
+            keyframes = layer_keyframes[track_no]
+            # A single keyframe can only produce one cel: no need to hash
+            deduplicate = len(keyframes) > 1
             
             # Track if we've hit a stop frame (blank keyframe) - used for track termination
             last_was_stop_frame = False
@@ -200,6 +297,7 @@ class XDTSExportEngine:
             for frame in keyframes:
                 # Check for cancellation
                 if self._is_cancelled():
+                    frame_exporter.cancel()
                     self._result.error_message = "Export cancelled by user"
                     return
                 
@@ -213,9 +311,10 @@ class XDTSExportEngine:
                 
                 relative_frame = frame - start_frame
                 
-                # Set document to this frame for stop frame detection
-                self.document.setCurrentTime(frame)
-                self.document.waitForDone()
+                # Seek once per frame; stop frame detection, the pixel reads
+                # and the export below all use this render and must not seek
+                document.setCurrentTime(frame)
+                document.waitForDone()
                 
                 # Check for stop frame (blank keyframe)
                 # When a blank frame is detected, emit null cell to end the hold
@@ -227,15 +326,17 @@ class XDTSExportEngine:
                 last_was_stop_frame = False
                 
                 # Determine cell label (with deduplication)
+                frame_error = f"Failed to export frame {frame} of {layer_name}"
                 cell_label = self._process_frame(
-                    frame_exporter, layer, frame, 
-                    layer_name, layer_folder,
-                    doc_info, hash_to_label
+                    frame_exporter, layer,
+                    layer_name, layer_prefix,
+                    doc_info, hash_to_label, deduplicate,
+                    frame_error
                 )
                 
                 if cell_label is None:
                     # Export failed
-                    self._result.error_message = f"Failed to export frame {frame} of {layer_name}"
+                    self._result.error_message = frame_error
                     return
                 
                 # Track unique exports
@@ -250,19 +351,23 @@ class XDTSExportEngine:
             # Terminate track with null cell (only if we didn't end on a stop frame)
             if not last_was_stop_frame:
                 add_track_terminator(track, duration)
-            
-            self._result.frame_count += len(keyframes)
         
-        # Export static layers (as single images, no folders)
+        # Export static layers (as single images, no folders). Their content
+        # doesn't change over time, so seek to the first frame just once.
         static_exported = 0
-        for layer in static_layers:
+        if static_layers:
+            document.setCurrentTime(start_frame)
+            document.waitForDone()
+        width = doc_info['width']
+        height = doc_info['height']
+        for static_no, layer in enumerate(static_layers):
             # Check for cancellation
             if self._is_cancelled():
+                frame_exporter.cancel()
                 self._result.error_message = "Export cancelled by user"
                 return
             
-            base_name = sanitize_filename(layer.name())
-            layer_name = make_unique_name(base_name, used_layer_names)
+            layer_name = layer_names[len(animated_layers) + static_no]
             
             # Report progress
             processed += 1
@@ -273,11 +378,14 @@ class XDTSExportEngine:
             )
             
             # Export as single image directly in export folder (no subfolder)
-            filename = f"{layer_name}.{self.options.image_format}"
+            filename = f"{layer_name}.{options.image_format}"
             filepath = os.path.join(self.export_path, filename)
             
-            # Use first frame for static layers
-            success = frame_exporter.export_frame(layer, start_frame, filepath)
+            pixel_data = layer.projectionPixelData(0, 0, width, height)
+            # Encode right away so a failed write stays a non-fatal warning
+            success = frame_exporter.export_frame_with_data(
+                pixel_data, filepath, background=False
+            )
             
             if success:
                 static_exported += 1
@@ -286,11 +394,19 @@ class XDTSExportEngine:
                 self._report_progress(
                     processed,
                     total_work,
-                    f"Warning: Failed to export {layer_name}"
+                    f"Warning: Failed to export {layer_name}",
+                    force=True
                 )
         
+        # Join the encoding pipeline: every frame must be on disk before
+        # copying duplicates from it and writing the timesheet
+        self._report_progress(processed, total_work, "Finishing export...", force=True)
+        frame_exporter.wait()
+        for existing_path, new_path in self._pending_copies:
+            copy_file(existing_path, new_path)
+        
         # Write the XDTS file using export name
-        xdts_filename = sanitize_filename(self.options.export_name) if self.options.export_name else "export"
+        xdts_filename = sanitize_filename(options.export_name) if options.export_name else "export"
         xdts_path = os.path.join(self.export_path, f"{xdts_filename}.xdts")
         write_xdts_file(xdts_doc, xdts_path)
         
@@ -298,89 +414,133 @@ class XDTSExportEngine:
         self._result.success = True
         self._result.output_path = xdts_path
         self._result.track_count = len(animated_layers)
+        self._result.frame_count = total_keyframes
         self._result.unique_frames_exported = total_unique + static_exported
     
-    def _build_filename(self, layer_name: str, cell_number: int) -> str:
-        """Build a filename based on the configured naming options.
+    def _make_filename_builder(self):
+        """Create a filename function for the configured naming options.
+        
+        The options are fixed for the whole export, so the prefix, suffix
+        and separator are combined once here and each call only fills in
+        the layer name and sequence number.
         
-        Args:
-            layer_name: Sanitized layer name.
-            cell_number: The cell/sequence number.
-            
         Returns:
-            Filename string (without path).
+            Callable (layer_name, cell_number) -> filename string (without path).
         """
-        sep = self.options.file_separator
-        prefix = self.options.file_prefix
-        suffix = self.options.file_suffix
-        seq = int_to_str(cell_number)
-        
-        parts = []
-        
-        # Add prefix if specified
-        if prefix:
-            parts.append(prefix)
-        
-        # Add layer name based on format
-        if self.options.file_format == ExportOptions.FORMAT_LAYER_SEQ:
-            parts.append(layer_name)
-        
-        # Add suffix if specified
-        if suffix:
-            parts.append(suffix)
-        
-        # Add sequence number
-        parts.append(seq)
+        options = self.options
+        sep = options.file_separator
+        head = options.file_prefix + sep if options.file_prefix else ""
+        middle = options.file_suffix + sep if options.file_suffix else ""
+        ext = f".{options.image_format}"
+        
+        if options.file_format == ExportOptions.FORMAT_LAYER_SEQ:
+            # Prefix_LayerName_Suffix_0001.ext
+            def build_filename(layer_name: str, cell_number: int) -> str:
+                return f"{head}{layer_name}{sep}{middle}{int_to_str(cell_number)}{ext}"
+        else:
+            # Prefix_Suffix_0001.ext
+            def build_filename(layer_name: str, cell_number: int) -> str:
+                return f"{head}{middle}{int_to_str(cell_number)}{ext}"
         
-        return sep.join(parts) + f".{self.options.image_format}"
+        return build_filename
     
-    def _process_frame(self, frame_exporter, layer, frame: int,
-                       layer_name: str, layer_folder: str,
-                       doc_info: dict, hash_to_label: dict) -> str:
+    def _process_frame(self, frame_exporter, layer,
+                       layer_name: str, layer_prefix: str,
+                       doc_info: dict, hash_to_label: dict,
+                       deduplicate: bool = True,
+                       error_message: str = None) -> str:
         """Process and potentially export a single frame.
         
         Handles deduplication by checking content hashes before export.
+        Held cels are caught first by comparing the content area with the
+        previous frame's, which skips hashing.
+        
+        Only the layer's content area is read and hashed; the full frame is
+        read only when it has to be exported. The caller must already have
+        moved the document to the frame; this method does not seek.
         
         Args:
             frame_exporter: FrameExporter instance.
             layer: The layer being exported.
-            frame: Frame number.
             layer_name: Sanitized layer name for filenames.
-            layer_folder: Output folder for this layer.
+            layer_prefix: Output folder for this layer, ending in a separator.
             doc_info: Document information dict.
-            hash_to_label: Hash-to-label map for deduplication.
+            hash_to_label: Content-key-to-label map for deduplication.
+            deduplicate: False to export the frame as cel 1 without hashing
+                (for layers with a single keyframe).
+            error_message: Error reported if the frame is written in the
+                background and fails.
             
         Returns:
             Cell label string, or None if export failed.
         """
-        # Set document to the target frame for projection data
-        self.document.setCurrentTime(frame)
-        self.document.waitForDone()
-        
-        # Check for duplicate content using pixel hash (always deduplicate)
-        # Use projectionPixelData which works for both paint layers and groups
-        pixel_data = layer.projectionPixelData(
-            0, 0, 
-            doc_info['width'], doc_info['height']
-        )
-        content_hash = compute_content_hash(pixel_data)
+        width = doc_info['width']
+        height = doc_info['height']
+        
+        if not deduplicate:
+            filepath = layer_prefix + self._filename_fn(layer_name, 1)
+            self._ensure_layer_folder()
+            pixel_data = layer.projectionPixelData(0, 0, width, height)
+            success = frame_exporter.export_frame_with_data(
+                pixel_data, filepath, error_message=error_message
+            )
+            return "1" if success else None
+        
+        # Check for duplicate content using a hash of the content area
+        # (always deduplicate). Use projectionPixelData which works for both
+        # paint layers and groups.
+        content_rect = get_content_rect(layer, width, height)
+        x, y, content_width, content_height = content_rect
+        if content_width and content_height:
+            region_data = layer.projectionPixelData(x, y, content_width, content_height)
+        else:
+            region_data = b""
+        
+        # Same pixels as the previous frame of this layer (a held cel)
+        prev_frame = self._prev_frame
+        if (prev_frame is not None and prev_frame[0] == content_rect
+                and prev_frame[1] == region_data):
+            return prev_frame[2]
+        
+        # Hash through a buffer view so the pixel data is never copied
+        content_key = (content_rect, compute_content_hash(memoryview(region_data)))
         
         # Return existing label if we've seen this content before
-        if content_hash in hash_to_label:
-            return hash_to_label[content_hash]
+        cell_label = hash_to_label.get(content_key)
+        if cell_label is not None:
+            self._prev_frame = (content_rect, region_data, cell_label)
+            return cell_label
         
         # New unique content - assign next cell number
         cell_number = len(hash_to_label) + 1
         cell_label = str(cell_number)
         
-        # Record hash for future deduplication
-        hash_to_label[content_hash] = cell_label
+        # Record content key for future deduplication
+        hash_to_label[content_key] = cell_label
+        self._prev_frame = (content_rect, region_data, cell_label)
         
         # Build output filename using configured format
-        filename = self._build_filename(layer_name, cell_number)
-        filepath = os.path.join(layer_folder, filename)
+        filename = self._filename_fn(layer_name, cell_number)
+        filepath = layer_prefix + filename
+        self._ensure_layer_folder()
+        
+        # Same content already exported for another layer: copy it instead
+        # of encoding again (done after all queued frames are written)
+        existing_path = self._global_hash_cache.get(content_key)
+        if existing_path is not None:
+            self._pending_copies.append((existing_path, filepath))
+            return cell_label
+        self._global_hash_cache[content_key] = filepath
+        
+        # Read the full frame for export (reuse the region if it covers the canvas)
+        if content_rect == (0, 0, width, height):
+            pixel_data = region_data
+        else:
+            pixel_data = layer.projectionPixelData(0, 0, width, height)
         
         # Export the frame
-        success = frame_exporter.export_frame(layer, frame, filepath)
+        success = frame_exporter.export_frame_with_data(
+            pixel_data, filepath, error_message=error_message
+        )
         
         return cell_label if success else None
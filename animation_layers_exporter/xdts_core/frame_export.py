@@ -1,29 +1,89 @@
 """Frame Export Handler
 
 Handles the export of individual animation frames to image files.
-Uses Krita's native document export.
+Uses Krita's native document export, or encodes 8-bit sRGB PNG frames
+directly on background threads (with imagecodecs if it is installed,
+otherwise with QImage).
 """
 
 import os
+import sys
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import krita
-from ..config import DEFAULT_PNG_COMPRESSION
+from ..config import DEFAULT_PNG_COMPRESSION, MAX_ENCODE_THREADS
+from ..qt_compat import QImage
+
+# Optional faster PNG encoder (not bundled with Krita)
+try:
+    import numpy
+    import imagecodecs
+except ImportError:
+    imagecodecs = None
+
+# Krita profiles with the standard sRGB tone curve. Other "sRGB" profiles,
+# such as the linear sRGB-elle-V2-g10.icc, need Krita's exporter.
+_SRGB_TRC_PROFILES = frozenset((
+    "sRGB-elle-V2-srgbtrc.icc",
+    "sRGB-elle-V4-srgbtrc.icc",
+    "sRGB built-in",
+))
+
+
+def _png_quality(compression: int) -> int:
+    """Map a zlib compression level (0-9) to Qt's PNG writer quality (100-0)."""
+    return 100 - (compression * 91 + 8) // 9
+
+
+def _png_phys_chunk(dots_per_meter: int) -> bytes:
+    """Build a PNG pHYs chunk giving the pixel density in dots per meter."""
+    data = struct.pack(">IIB", dots_per_meter, dots_per_meter, 1)
+    return (
+        struct.pack(">I", len(data)) + b"pHYs" + data
+        + struct.pack(">I", zlib.crc32(b"pHYs" + data))
+    )
+
+
+# Signature (8 bytes) plus the IHDR chunk (25 bytes) that opens every PNG
+_PNG_HEADER_SIZE = 33
 
 
 class FrameExporter:
-    """Exports individual layer frames using temporary documents.
+    """Exports individual layer frames using a temporary document.
+    
+    Uses an isolated temporary document, created once and reused for every
+    frame, to ensure clean output with proper color profile handling. This
+    avoids issues with layer.save() and gives us full control over the
+    export process.
     
-    Creates isolated temporary documents for each frame export to ensure
-    clean output with proper color profile handling. This avoids issues
-    with layer.save() and gives us full control over the export process.
+    For 8-bit RGBA sRGB documents, PNG frames are instead encoded straight
+    from the pixel data with QImage on a small thread pool, so encoding
+    overlaps with Krita rendering the next frames on the main thread.
+    Call wait() to block until queued frames are written, cancel() to drop
+    frames that have not started encoding, and close() when done with the
+    exporter.
     """
     
-    def __init__(self, source_document):
+    def __init__(self, source_document, png_compression: int = DEFAULT_PNG_COMPRESSION,
+                 fast_encode: bool = False):
         """Initialize with the source document to export from.
         
         Args:
             source_document: The Krita document containing layers to export.
+            png_compression: zlib compression level (0-9) for PNG output.
+            fast_encode: Skip PNG row filtering where the encoder allows it
+                (imagecodecs only; Krita and QImage choose filters themselves).
         """
         self.source = source_document
+        self._png_compression = png_compression
+        self._png_filter = None  # imagecodecs default (adaptive filtering)
+        if fast_encode and imagecodecs is not None:
+            # PNG.FILTER is missing from older imagecodecs releases
+            png_filters = getattr(getattr(imagecodecs, "PNG", None), "FILTER", None)
+            self._png_filter = getattr(png_filters, "NONE", None)
         self.krita_instance = krita.Krita.instance()
         
         # Cache document properties for creating matching temp documents
@@ -33,6 +93,34 @@ class FrameExporter:
         self._color_depth = source_document.colorDepth()
         self._color_profile = source_document.colorProfile()
         self._resolution = source_document.resolution()
+        # Resolution in the unit PNG uses (pixels per inch -> per meter)
+        self._dots_per_meter = round(self._resolution / 0.0254)
+        
+        # Temporary export document, created on first use and reused
+        self._temp_doc = None
+        
+        # Background PNG encoding (Krita's API itself must stay on this thread)
+        self._executor = None
+        self._pending = deque()
+        if self._supports_direct_encode():
+            workers = max(1, min(MAX_ENCODE_THREADS, (os.cpu_count() or 2) - 1))
+            self._executor = ThreadPoolExecutor(max_workers=workers)
+            self._max_pending = workers * 2
+    
+    def _supports_direct_encode(self) -> bool:
+        """Check whether frames can be encoded without a Krita document.
+        
+        Krita returns 8-bit RGBA pixels in BGRA byte order, which matches
+        QImage's ARGB32 layout on little-endian machines. Other color models,
+        depths or profiles (including linear sRGB) go through Krita's
+        exporter so colors are handled correctly.
+        """
+        return (
+            self._color_model == "RGBA"
+            and self._color_depth == "U8"
+            and self._color_profile in _SRGB_TRC_PROFILES
+            and sys.byteorder == "little"
+        )
     
     def export_frame(self, layer, frame_number: int, output_path: str) -> bool:
         """Export a single frame from a layer to a image file.
@@ -55,37 +143,198 @@ class FrameExporter:
         # Get pixel data from the layer at full document size
         pixel_data = layer.projectionPixelData(0, 0, self._width, self._height)
         
+        return self.export_frame_with_data(pixel_data, output_path)
+    
+    def export_frame_with_data(self, pixel_data: bytes, output_path: str,
+                               background: bool = True,
+                               error_message: str = None) -> bool:
+        """Export already rendered pixel data to an image file.
+        
+        Use this when the caller has already positioned the source document
+        on the frame and read the layer's projection, to avoid seeking and
+        rendering the same frame twice.
+        
+        Args:
+            pixel_data: Raw full-document-size pixel bytes from the layer.
+            output_path: Full path for the output image file.
+            background: Queue PNG frames for the encoding threads. Queued
+                frames report write failures later, from wait() or a later
+                call, as OSError. Pass False to encode before returning.
+            error_message: Message for that OSError if this frame is queued
+                and fails, so callers can name the layer and frame.
+            
+        Returns:
+            True if export succeeded (or the frame was queued), False otherwise.
+        """
         if not pixel_data:
             return False
         
-        # Build a temporary document for clean export
-        temp_doc = self._create_temp_document()
+        _, ext = os.path.splitext(output_path)
+        ext = ext.lower()
+        
+        # Encode PNG frames directly when possible, on the encoding threads
+        # unless the caller needs the result now. The buffer is shared, not
+        # copied: Krita returns a new array for every read.
+        if self._executor is not None and ext == '.png':
+            if not background:
+                try:
+                    self._encode_png(pixel_data, output_path)
+                except OSError:
+                    return False
+                return True
+            self._submit_encode(pixel_data, output_path, error_message)
+            return True
+        
+        # Reuse the temporary document for clean export
+        temp_doc = self._get_temp_document()
         if temp_doc is None:
             return False
         
+        # Transfer pixels to temp document (overwrites the whole canvas)
+        self._transfer_pixels(temp_doc, pixel_data)
+        
+        # Choose export config based on requested extension
+        if ext == '.tga':
+            export_config = self._build_tga_config()
+        else:
+            # Default to PNG settings
+            export_config = self._build_png_config()
+
+        return temp_doc.exportImage(output_path, export_config)
+    
+    def _submit_encode(self, pixel_data: bytes, output_path: str,
+                       error_message: str = None) -> None:
+        """Queue a frame for PNG encoding on the thread pool.
+        
+        Blocks while too many frames are in flight to bound memory use.
+        
+        Raises:
+            OSError: If a previously queued frame failed to be written.
+        """
+        while len(self._pending) >= self._max_pending:
+            self._finish_encode(*self._pending.popleft())
+        future = self._executor.submit(self._encode_png, pixel_data, output_path)
+        self._pending.append((future, error_message))
+    
+    def _finish_encode(self, future, error_message: str = None) -> None:
+        """Wait for a queued frame and report its failure with its own message.
+        
+        Raises:
+            OSError: If the frame failed to be written.
+        """
         try:
-            # Enable batch mode to suppress export dialogs
-            temp_doc.setBatchmode(True)
-            
-            # Transfer pixels to temp document
-            self._transfer_pixels(temp_doc, pixel_data)
-            
-            # Choose export config based on requested extension
-            _, ext = os.path.splitext(output_path)
-            ext = ext.lower()
-            if ext == '.tga':
-                export_config = self._build_tga_config()
+            future.result()
+        except OSError as e:
+            if error_message is None:
+                raise
+            raise OSError(error_message) from e
+    
+    def _encode_png(self, pixel_data: bytes, output_path: str) -> None:
+        """Encode BGRA pixel data to a PNG file (runs on a worker thread).
+        
+        The PNG is written to a temporary file and then moved into place, so
+        an existing file at output_path is replaced rather than rewritten.
+        Writing through a file that is hard-linked elsewhere (e.g. by an
+        older export) would change the other file too.
+        
+        Raises:
+            OSError: If the file could not be written.
+        """
+        temp_path = output_path + ".part"
+        try:
+            self._write_png(pixel_data, temp_path)
+            os.replace(temp_path, output_path)
+        except Exception as e:
+            # Encoder errors (e.g. imagecodecs.PngError) become OSError too
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            # Report the real output file, not the temporary one
+            raise OSError(f"Failed to write {output_path}") from e
+    
+    def _write_png(self, pixel_data: bytes, output_path: str) -> None:
+        """Write BGRA pixel data to a new PNG file.
+        
+        Uses imagecodecs when available, which skips Qt's image I/O layer
+        and releases the GIL while compressing. It writes no resolution, so
+        a pHYs chunk is added to match the Krita and QImage output.
+        
+        Raises:
+            OSError: If the file could not be written.
+        """
+        # Zero-copy view of the pixel buffer
+        pixel_view = memoryview(pixel_data)
+        
+        if imagecodecs is not None:
+            bgra = numpy.frombuffer(pixel_view, dtype=numpy.uint8)
+            # The channel swap yields a strided view; png_encode needs C order
+            rgba = numpy.ascontiguousarray(
+                bgra.reshape(self._height, self._width, 4)[..., (2, 1, 0, 3)]
+            )
+            if self._png_filter is not None:
+                encoded = imagecodecs.png_encode(
+                    rgba, level=self._png_compression, filter=self._png_filter
+                )
             else:
-                # Default to PNG settings
-                export_config = self._build_png_config()
-
-            success = temp_doc.exportImage(output_path, export_config)
-            
-            return success
-            
+                encoded = imagecodecs.png_encode(rgba, level=self._png_compression)
+            encoded_view = memoryview(encoded)
+            with open(output_path, 'wb') as f:
+                f.write(encoded_view[:_PNG_HEADER_SIZE])
+                f.write(_png_phys_chunk(self._dots_per_meter))
+                f.write(encoded_view[_PNG_HEADER_SIZE:])
+            return
+        
+        image = QImage(
+            pixel_view, self._width, self._height,
+            self._width * 4, QImage.Format.Format_ARGB32
+        )
+        # Match the resolution Krita would write
+        image.setDotsPerMeterX(self._dots_per_meter)
+        image.setDotsPerMeterY(self._dots_per_meter)
+        if not image.save(output_path, "PNG", _png_quality(self._png_compression)):
+            raise OSError(f"Failed to write {output_path}")
+    
+    def wait(self) -> None:
+        """Block until all queued frames have been written.
+        
+        Raises:
+            OSError: If a queued frame failed to be written.
+        """
+        while self._pending:
+            self._finish_encode(*self._pending.popleft())
+    
+    def cancel(self) -> None:
+        """Drop queued frames that have not started encoding yet.
+        
+        Frames already being encoded are still finished by close().
+        """
+        while self._pending:
+            future, _ = self._pending.popleft()
+            future.cancel()
+    
+    def close(self) -> None:
+        """Finish queued frames and release the encoding threads and temp document."""
+        try:
+            self.wait()
         finally:
-            # Always clean up the temp document
-            temp_doc.close()
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            if self._temp_doc is not None:
+                self._temp_doc.close()
+                self._temp_doc = None
+    
+    def _get_temp_document(self):
+        """Get the shared temporary document, creating it on first use.
+        
+        Returns:
+            The temporary Krita document, or None if creation failed.
+        """
+        if self._temp_doc is None:
+            self._temp_doc = self._create_temp_document()
+            if self._temp_doc is not None:
+                # Enable batch mode to suppress export dialogs
+                self._temp_doc.setBatchmode(True)
+        return self._temp_doc
     
     def _create_temp_document(self):
         """Create a temporary document matching source document properties.
@@ -118,7 +367,8 @@ class FrameExporter:
             target_layer = children[0]
             target_layer.setPixelData(pixel_data, 0, 0, self._width, self._height)
         
-        # Ensure the document is fully updated
+        # Refresh the projection and wait for it: exportImage() fails rather
+        # than waiting if an update is still queued
         temp_doc.refreshProjection()
         temp_doc.waitForDone()
     
@@ -130,7 +380,7 @@ class FrameExporter:
         """
         config = krita.InfoObject()
         config.setProperty("alpha", True)
-        config.setProperty("compression", DEFAULT_PNG_COMPRESSION)
+        config.setProperty("compression", self._png_compression)
         config.setProperty("indexed", False)
         config.setProperty("interlaced", False)
         return config
@@ -158,7 +158,8 @@ def get_group_keyframes(group, start_frame: int, end_frame: int) -> list:
         for child in node.childNodes():
             if child.type() in ANIMATED_LAYER_TYPES and child.animated():
                 for frame in range(start_frame, end_frame + 1):
-                    if child.hasKeyframeAtTime(frame):
+                    # Skip frames already found on a sibling
+                    if frame not in keyframe_set and child.hasKeyframeAtTime(frame):
                         keyframe_set.add(frame)
             elif child.type() == 'grouplayer':
                 collect_keyframes(child)
@@ -226,6 +227,31 @@ def count_total_keyframes(layers: list, start_frame: int, end_frame: int) -> int
     return total
 
 
+def get_content_rect(layer, width: int, height: int) -> tuple:
+    """Get the layer's content bounds at the current frame, clipped to the canvas.
+    
+    Pixels outside this rectangle are fully transparent, so two frames with
+    the same rectangle and the same pixels inside it have identical content.
+    
+    The document must be set to the target frame before calling this function.
+    
+    Args:
+        layer: The Krita layer node (document must already be set to the frame).
+        width: Document width in pixels.
+        height: Document height in pixels.
+        
+    Returns:
+        Tuple of (x, y, width, height); width/height are 0 if the layer
+        has no content on the canvas.
+    """
+    bounds = layer.bounds()
+    x0 = max(bounds.x(), 0)
+    y0 = max(bounds.y(), 0)
+    x1 = min(bounds.x() + bounds.width(), width)
+    y1 = min(bounds.y() + bounds.height(), height)
+    return (x0, y0, max(x1 - x0, 0), max(y1 - y0, 0))
+
+
 def is_stop_frame(layer) -> bool:
     """Check if a keyframe is a stop frame (blank keyframe).
     
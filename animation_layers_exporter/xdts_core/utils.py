@@ -5,8 +5,19 @@ General-purpose helper functions used throughout the animation layers exporter.
 
 import os
 import re
+import shutil
 import hashlib
 
+# Optional fast non-cryptographic hashing (not bundled with Krita)
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+# Characters that are problematic in filenames across operating systems
+_INVALID_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
+
 
 def mkdir(directory: str) -> None:
     """Create a directory if it doesn't exist.
@@ -25,6 +36,22 @@ def mkdir(directory: str) -> None:
         raise e
 
 
+def copy_file(source: str, destination: str) -> None:
+    """Copy a file's contents, replacing any existing destination file.
+    
+    The destination is removed first rather than overwritten, so a file
+    that shares its data with another (e.g. a hard link left by an older
+    export) never has that other file rewritten as well.
+    
+    Args:
+        source: Path of the existing file.
+        destination: Path of the file to create.
+    """
+    if os.path.exists(destination):
+        os.remove(destination)
+    shutil.copyfile(source, destination)
+
+
 def int_to_str(value: int, num_digits: int = 4) -> str:
     """Convert an integer to a zero-padded string.
     
@@ -53,24 +80,32 @@ def sanitize_filename(name: str) -> str:
     # Replace spaces with underscores
     sanitized = name.replace(" ", "_")
     # Remove characters that are problematic in filenames
-    sanitized = re.sub(r'[<>:"/\\|?*]', '', sanitized)
+    sanitized = _INVALID_FILENAME_CHARS.sub('', sanitized)
     # Strip leading/trailing whitespace and dots
     sanitized = sanitized.strip('. ')
     return sanitized if sanitized else "unnamed"
 
 
-def compute_content_hash(data: bytes) -> str:
-    """Compute an MD5 hash of binary data.
+def compute_content_hash(data: bytes) -> bytes:
+    """Compute a content hash of binary data.
     
     Used for detecting duplicate frame content to avoid redundant exports.
+    Deduplication only needs to catch accidental matches, so the much faster
+    XXH3-128 hash is used when the optional xxhash package is installed.
+    Falls back to 128-bit BLAKE2b otherwise, which is faster than MD5 or
+    SHA-256 in software and releases the GIL for large buffers.
     
     Args:
-        data: Binary data (e.g., pixel data from a layer).
+        data: Binary data (e.g., pixel data from a layer). Pass the whole
+            contiguous buffer; it is hashed in a single call.
         
     Returns:
-        Hexadecimal MD5 hash string.
+        Raw 16-byte digest (cheaper to hash and compare as a dict key
+        than a hex string; call .hex() for display).
     """
-    return hashlib.md5(data).hexdigest()
+    if xxhash is not None:
+        return xxhash.xxh3_128_digest(data)
+    return hashlib.blake2b(data, digest_size=16).digest()
 
 
 def make_unique_name(name: str, used_names: set) -> str:
@@ -107,3 +142,40 @@ def make_unique_name(name: str, used_names: set) -> str:
     unique_name = f"{name}_{counter}"
     used_names.add(unique_name)
     return unique_name
+
+
+def make_unique_names(names: list) -> list:
+    """Make a list of names unique in one pass.
+    
+    Produces the same result as calling make_unique_name() for each name in
+    order, but remembers the next free suffix per name so many duplicates
+    don't rescan all earlier suffixes.
+    
+    Args:
+        names: The desired names, in priority order.
+        
+    Returns:
+        List of unique names, parallel to the input.
+        
+    Example:
+        >>> make_unique_names(["Layer", "Layer", "BG", "Layer"])
+        ['Layer', 'Layer_1', 'BG', 'Layer_2']
+    """
+    used_names = set()
+    next_suffix = {}
+    unique_names = []
+    
+    for name in names:
+        if name not in used_names:
+            unique_name = name
+        else:
+            # Suffixes below next_suffix are already taken
+            counter = next_suffix.get(name, 1)
+            while f"{name}_{counter}" in used_names:
+                counter += 1
+            next_suffix[name] = counter + 1
+            unique_name = f"{name}_{counter}"
+        used_names.add(unique_name)
+        unique_names.append(unique_name)
+    
+    return unique_names